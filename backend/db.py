@@ -1,14 +1,12 @@
 # db.py: database connection dependency
-import asyncpg
 from fastapi import Depends
-from backend.config import DATABASE_URL
+from services.clients import get_pool
 
 # ───────────────────────────────────────────
-#  DB dependency
+#  DB dependency (connections come from the shared pool,
+#  which the app lifespan opens at startup)
 # ───────────────────────────────────────────
 async def get_db():
-    conn = await asyncpg.connect(DATABASE_URL)
-    try:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
         yield conn
-    finally:
-        await conn.close()
@@ -1,10 +1,32 @@
 # main.py: bring it all together
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from backend.routers import auth, page, webhook, review
+from backend.routers import auth, page, webhook, review, analytics, metrics
 from fastapi.middleware.cors import CORSMiddleware
 from backend.config   import JWKS_URL, FRONTEND_API, ALLOWED_ORIGIN
+from services import clients, stats
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the DB pool, LLM and Graph clients once per worker, before traffic
+    await clients.startup()
+    # Warm the JWKS cache so the first login doesn't wait on Clerk
+    try:
+        await asyncio.to_thread(auth.load_jwks)
+    except Exception as exc:
+        print(f"JWKS prefetch failed, will retry on first request: {exc}")
+    # Publish this worker's counters for /metrics (multi-process mode only)
+    flusher = asyncio.create_task(stats.flush_forever()) if os.getenv("METRICS_DIR") else None
+    yield
+    if flusher:
+        flusher.cancel()
+    await clients.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[ALLOWED_ORIGIN],
@@ -15,4 +37,6 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(page.router)
 app.include_router(webhook.router)
-app.include_router(review.router)
\ No newline at end of file
+app.include_router(review.router)
+app.include_router(analytics.router)
+app.include_router(metrics.router)
\ No newline at end of file
@@ -0,0 +1,22 @@
+# routers/analytics.py: dashboard reads, served from the rollup tables
+from fastapi import APIRouter, Depends, Query
+from backend.db import get_db
+from services import rollups
+
+router = APIRouter(prefix='/analytics')
+
+@router.get('/summary')
+async def summary(
+    page_id: str = Query(None),
+    hours: int = Query(24, ge=1, le=24 * 90),
+    db=Depends(get_db)
+):
+    return await rollups.summary(db, hours=hours, page_id=page_id)
+
+@router.get('/hourly')
+async def hourly(
+    page_id: str = Query(...),
+    hours: int = Query(24, ge=1, le=24 * 90),
+    db=Depends(get_db)
+):
+    return await rollups.hourly(db, page_id, hours=hours)
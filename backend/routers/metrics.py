@@ -0,0 +1,10 @@
+# routers/metrics.py: Prometheus endpoint, summed across every process
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from services import stats
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return stats.render()
@@ -1,8 +1,7 @@
 # routers/page.py: page install route
-import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query
 from backend.routers.auth import verify_session_jwt
-from backend.db import get_db
+from services.clients import get_graph, get_pool
 
 router = APIRouter()
 
@@ -11,41 +10,42 @@ async def install_page(
     token: str = Query(...),
     page_id: str = Query(...),
     access_token: str = Query(...),
-    db=Depends(get_db)
 ):
     claims = verify_session_jwt(token)
     tenant_user_id = claims["sub"]
-    tenant_row = await db.fetchrow(
-        "SELECT id FROM tenants WHERE user_id = $1", tenant_user_id
-    )
+    # pooled connections are borrowed around the queries only, not the Graph call
+    pool = await get_pool()
+    async with pool.acquire() as db:
+        tenant_row = await db.fetchrow(
+            "SELECT id FROM tenants WHERE user_id = $1", tenant_user_id
+        )
     if not tenant_row:
         raise HTTPException(404, "Tenant not found")
     tenant_id = tenant_row["id"]
 
         # 1) Fetch the Page’s name
-    url = f"https://graph.facebook.com/v22.0/{page_id}"
     params = {"fields": "name", "access_token": access_token}
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        page_info = resp.json()
+    resp = await get_graph().get(f"/{page_id}", params=params)
+    resp.raise_for_status()
+    page_info = resp.json()
     page_name = page_info.get("name")
     print("Welcome ",page_name)
-    await db.execute(
-        """
-        INSERT INTO page_tokens (tenant_id,page_id,access_token,page_name)
-        VALUES ($1,$2,$3,$4)
-        ON CONFLICT (page_id) DO UPDATE SET access_token = EXCLUDED.access_token
-        """,
-        tenant_id, page_id, access_token, page_name
-    )
-    await db.execute(
-        """
-        INSERT INTO page_settings (page_id, auto_reply_enabled)
-        VALUES ($1, TRUE)
-        ON CONFLICT (page_id) DO NOTHING
-        """,
-        page_id,
-    )
+    async with pool.acquire() as db:
+        await db.execute(
+            """
+            INSERT INTO page_tokens (tenant_id,page_id,access_token,page_name)
+            VALUES ($1,$2,$3,$4)
+            ON CONFLICT (page_id) DO UPDATE SET access_token = EXCLUDED.access_token
+            """,
+            tenant_id, page_id, access_token, page_name
+        )
+        await db.execute(
+            """
+            INSERT INTO page_settings (page_id, auto_reply_enabled)
+            VALUES ($1, TRUE)
+            ON CONFLICT (page_id) DO NOTHING
+            """,
+            page_id,
+        )
     # (rest of your response)
     return {"page_id": page_id, "page_name": page_name}
\ No newline at end of file
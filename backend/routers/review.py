@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.background import BackgroundTasks
 from backend.db import get_db
-from services.reply_engine import handle_comment
+from services.reply_engine import queue_comment
+from services import rollups
 
 router = APIRouter(prefix='/comments')
 
@@ -31,24 +32,30 @@ async def approve_comment(
     )
     if not row:
         raise HTTPException(404, 'Comment not found or not pending review')
-    await db.execute(
-        "UPDATE comments SET status='approved' WHERE id=$1",
-        comment_id
-    )
+    async with db.transaction():
+        updated = await db.execute(
+            "UPDATE comments SET status='approved' WHERE id=$1 AND status='pending_review'",
+            comment_id
+        )
+        if updated.endswith(" 1"):
+            await rollups.record_review(db, row["page_id"])
     # queue the approved comment for AI reply
-    background_tasks.add_task(handle_comment, comment_id)
+    await queue_comment(background_tasks, comment_id)
     return {'id': comment_id, 'status': 'approved'}
 
 @router.post('/review/{comment_id}/reject')
 async def reject_comment(comment_id: str, db=Depends(get_db)):
     row = await db.fetchrow(
-        "SELECT id FROM comments WHERE id=$1 AND status='pending_review'",
+        "SELECT page_id FROM comments WHERE id=$1 AND status='pending_review'",
         comment_id
     )
     if not row:
         raise HTTPException(404, 'Comment not found or not pending review')
-    await db.execute(
-        "UPDATE comments SET status='rejected' WHERE id=$1",
-        comment_id
-    )
+    async with db.transaction():
+        updated = await db.execute(
+            "UPDATE comments SET status='rejected' WHERE id=$1 AND status='pending_review'",
+            comment_id
+        )
+        if updated.endswith(" 1"):
+            await rollups.record_review(db, row["page_id"])
     return {'id': comment_id, 'status': 'rejected'}
\ No newline at end of file
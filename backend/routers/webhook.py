@@ -1,9 +1,10 @@
 # routers/webhook.py: Facebook webhook handler
 from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, Request, HTTPException, BackgroundTasks
-from backend.db import get_db
+from fastapi import APIRouter, Request, HTTPException, BackgroundTasks
 from backend.config import VERIFY_TOKEN
 from backend.handlers import facebook  # new
+from services import stats
+from services.clients import get_pool
 
 router = APIRouter()
 
@@ -26,28 +27,32 @@ async def verify(request: Request):
 async def webhook(
     request: Request,
     background_tasks: BackgroundTasks,
-    db=Depends(get_db),
 ):
+    # no get_db: a comment waits on the sentiment LLM, so handlers borrow
+    # pooled connections per query block instead of holding one throughout
+    pool = await get_pool()
     payload = await request.json()
+    stats.incr("webhook_requests")
     for entry in payload.get("entry", []):
         page_id = entry["id"]
         print(page_id)
 
         # ─── Seed per-Page settings if it doesn’t exist ───
-        await db.execute(
-            """
-            INSERT INTO page_settings (page_id)
-            VALUES ($1)
-            ON CONFLICT (page_id) DO NOTHING
-            """,
-            page_id
-        )
+        async with pool.acquire() as db:
+            await db.execute(
+                """
+                INSERT INTO page_settings (page_id)
+                VALUES ($1)
+                ON CONFLICT (page_id) DO NOTHING
+                """,
+                page_id
+            )
 
-        # ─── Read that flag ───
-        enabled = await db.fetchval(
-            "SELECT auto_reply_enabled FROM page_settings WHERE page_id = $1",
-            page_id
-        )
+            # ─── Read that flag ───
+            enabled = await db.fetchval(
+                "SELECT auto_reply_enabled FROM page_settings WHERE page_id = $1",
+                page_id
+            )
         # if not enabled:
         #     continue  # auto-reply is turned off for this Page
         # seed page_settings row (same code) …
@@ -62,11 +67,11 @@ async def webhook(
                 created_at = None
 
             if field == "feed":
-                await facebook.handle_feed(val, page_id, db, background_tasks, created_at)
+                await facebook.handle_feed(val, page_id, pool, background_tasks, created_at)
             elif field == "mention":
-                await facebook.handle_mention(val, created_at, db)
+                await facebook.handle_mention(val, page_id, created_at, pool)
             elif field == "messages":
-                await facebook.handle_message(val, created_at, db)
+                await facebook.handle_message(val, created_at, pool)
             # instagram handlers will slot in here later
 
     return {"status": "received"}
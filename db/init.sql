@@ -50,11 +50,17 @@ CREATE TABLE IF NOT EXISTS comments (
   CONSTRAINT fk_comments_parent FOREIGN KEY (parent_id) REFERENCES comments(id)
 );
 CREATE INDEX IF NOT EXISTS idx_comments_created_at ON comments(created_at);
+-- small partial indexes for the work queues (manage.py list_pending, /comments/review)
+CREATE INDEX IF NOT EXISTS idx_comments_unreplied ON comments(created_at)
+  WHERE replied = FALSE AND parent_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_comments_pending_review ON comments(page_id, created_at)
+  WHERE status = 'pending_review';
 
 
 -- 4) Mentions: when your Page is mentioned in a post or comment
 CREATE TABLE IF NOT EXISTS mentions (
   id           TEXT         PRIMARY KEY,  -- e.g. mention-<post_id>-<sender_id>-<ts>
+  page_id      TEXT,                      -- the Page that was mentioned
   post_id      TEXT         NOT NULL,
   sender_id    TEXT         NOT NULL,
   sender_name  TEXT,
@@ -85,13 +91,119 @@ CREATE TABLE IF NOT EXISTS page_settings (
 );
 
 -- No seed rows here; we’ll INSERT on first webhook
+-- Replies double as the outbox: rows are written 'pending' and a sender
+-- posts them to Facebook, retrying with backoff until 'sent' or 'failed'
 CREATE TABLE IF NOT EXISTS replies (
-    id          SERIAL       PRIMARY KEY,
-    post_id     TEXT         NOT NULL,
-    reply_text  TEXT         NOT NULL,
-    created_at  TIMESTAMPTZ  NOT NULL DEFAULT now(),
-    sent        BOOLEAN      NOT NULL DEFAULT FALSE
+    id              SERIAL       PRIMARY KEY,
+    post_id         TEXT         NOT NULL,          -- the comment being replied to
+    reply_text      TEXT         NOT NULL,
+    created_at      TIMESTAMPTZ  NOT NULL DEFAULT now(),
+    source          TEXT         NOT NULL DEFAULT 'llm',   -- 'llm' or 'faq'
+    faq_score       REAL,                                  -- best FAQ-index similarity, if looked up
+    state           TEXT         NOT NULL DEFAULT 'pending', -- 'pending', 'sent', 'failed'
+    attempts        INTEGER      NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ  NOT NULL DEFAULT now(),
+    last_error      TEXT,
+    fb_reply_id     TEXT,
+    sent_at         TIMESTAMPTZ
 );
+-- (indexes are created after the upgrade section below)
+
+-- 7) Curated FAQ answers, indexed per Page together with sent replies
+CREATE TABLE IF NOT EXISTS faq_entries (
+  id          SERIAL       PRIMARY KEY,
+  page_id     TEXT         NOT NULL,
+  question    TEXT         NOT NULL,
+  answer      TEXT         NOT NULL,
+  created_at  TIMESTAMPTZ  NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_faq_entries_page_id ON faq_entries(page_id);
+
+-- 8) Engagement rollups, maintained incrementally by services/rollups.py
+--    (manage.py rebuild_rollups recomputes them from the raw tables)
+CREATE TABLE IF NOT EXISTS engagement_hourly (
+  page_id            TEXT              NOT NULL,
+  bucket             TIMESTAMPTZ       NOT NULL,   -- date_trunc('hour', …)
+  comments           INTEGER           NOT NULL DEFAULT 0,  -- customer comments (not the Page's own)
+  positive           INTEGER           NOT NULL DEFAULT 0,
+  neutral            INTEGER           NOT NULL DEFAULT 0,
+  negative           INTEGER           NOT NULL DEFAULT 0,
+  replies_sent       INTEGER           NOT NULL DEFAULT 0,  -- bucketed by sent_at
+  faq_replies        INTEGER           NOT NULL DEFAULT 0,
+  reply_latency_sum  DOUBLE PRECISION  NOT NULL DEFAULT 0,  -- seconds from comment to reply
+  mentions           INTEGER           NOT NULL DEFAULT 0,
+  PRIMARY KEY (page_id, bucket)
+);
+-- all-Pages summaries filter on bucket alone; the primary key can't serve them
+CREATE INDEX IF NOT EXISTS idx_engagement_hourly_bucket ON engagement_hourly(bucket);
+
+CREATE TABLE IF NOT EXISTS page_backlog (
+  page_id         TEXT     PRIMARY KEY,
+  pending_review  INTEGER  NOT NULL DEFAULT 0
+);
+
+-- ───────────────────────────────────────────
+--  Upgrades for databases created by an older init.sql.
+--  Everything below is idempotent: on a fresh database it is a no-op,
+--  and re-running this file against an existing one brings it up to date.
+-- ───────────────────────────────────────────
+
+-- mentions: remember which Page was mentioned (used by the rollups)
+ALTER TABLE mentions ADD COLUMN IF NOT EXISTS page_id TEXT;
+UPDATE mentions m
+   SET page_id = p.page_id
+  FROM posts p
+ WHERE p.id = m.post_id
+   AND m.page_id IS NULL;
+
+-- replies: FAQ bookkeeping + outbox columns
+ALTER TABLE replies ADD COLUMN IF NOT EXISTS source          TEXT        NOT NULL DEFAULT 'llm';
+ALTER TABLE replies ADD COLUMN IF NOT EXISTS faq_score       REAL;
+ALTER TABLE replies ADD COLUMN IF NOT EXISTS attempts        INTEGER     NOT NULL DEFAULT 0;
+ALTER TABLE replies ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE replies ADD COLUMN IF NOT EXISTS last_error      TEXT;
+ALTER TABLE replies ADD COLUMN IF NOT EXISTS fb_reply_id     TEXT;
+ALTER TABLE replies ADD COLUMN IF NOT EXISTS sent_at         TIMESTAMPTZ;
+
+-- `state` must not simply default to 'pending' on old rows: the old code never
+-- set replies.sent, so every reply already on Facebook would be posted again.
+-- Old rows are 'sent' when their comment was marked replied, otherwise
+-- 'failed' (review them, then `manage.py retry_failed` re-queues on purpose).
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM information_schema.columns
+     WHERE table_schema = current_schema()
+       AND table_name = 'replies' AND column_name = 'state'
+  ) THEN
+    ALTER TABLE replies ADD COLUMN state TEXT NOT NULL DEFAULT 'failed';
+    UPDATE replies r
+       SET state       = 'sent',
+           fb_reply_id = c.reply_id,
+           sent_at     = r.created_at
+      FROM comments c
+     WHERE c.id = r.post_id
+       AND c.replied = TRUE;
+    UPDATE replies
+       SET last_error = 'created before the outbox; delivery unknown'
+     WHERE state = 'failed';
+    ALTER TABLE replies ALTER COLUMN state SET DEFAULT 'pending';
+    ALTER TABLE replies DROP COLUMN IF EXISTS sent;
+  END IF;
+END $$;
+
+-- One reply per comment: keep the delivered one (else the newest) of any duplicates
+DELETE FROM replies r
+ USING (
+   SELECT id,
+          ROW_NUMBER() OVER (PARTITION BY post_id ORDER BY (state = 'sent') DESC, id DESC) AS rn
+     FROM replies
+ ) d
+ WHERE r.id = d.id
+   AND d.rn > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_replies_post_id ON replies(post_id);
+CREATE INDEX IF NOT EXISTS idx_replies_outbox ON replies(next_attempt_at) WHERE state = 'pending';
 
 
 COMMIT;
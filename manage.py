@@ -6,7 +6,6 @@ from dotenv import load_dotenv
 import typer
 from rich.console import Console
 from rich.table import Table
-import asyncpg
 
 # Load .env variables (including DATABASE_URL)
 # Point to the backend/.env file explicitly
@@ -15,13 +14,17 @@ load_dotenv(dotenv_path=env_path)
 
 app = typer.Typer()
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Heavy imports (asyncpg, openai, scikit-learn…) happen inside the commands
+# that need them, so `--help` and simple toggles start instantly.
 async def get_db():
+    import asyncpg
     conn = await asyncpg.connect(DATABASE_URL)
     try:
         yield conn
     finally:
         await conn.close()
 async def get_conn():
+    import asyncpg
     return await asyncpg.connect(DATABASE_URL)
 
 @app.command()
@@ -57,7 +60,8 @@ def list_pending():
             """
             SELECT id, user_name, text, created_at
               FROM comments
-             WHERE replied = FALSE AND parent_id IS NULL;
+             WHERE replied = FALSE AND parent_id IS NULL
+             ORDER BY created_at;
             """
         )
         await conn.close()
@@ -74,12 +78,217 @@ def list_pending():
 @app.command()
 def reply(comment_id: str):
     """Manually trigger auto-reply for a specific comment."""
+    from services import clients
     from services.reply_engine import handle_comment
 
     async def _reply():
-        await handle_comment(comment_id)
+        try:
+            await handle_comment(comment_id)
+        finally:
+            await clients.shutdown()
         Console().print(f"Triggered auto-reply for {comment_id}")
     asyncio.run(_reply())
 
+@app.command()
+def send_replies(
+    once: bool = typer.Option(False, help="Drain what is due and exit"),
+    interval: float = typer.Option(5.0, help="Seconds between polls"),
+):
+    """Run the outbox sender: deliver pending replies, retrying with backoff."""
+    from services import clients, outbox
+
+    async def _send():
+        try:
+            if once:
+                conn = await get_conn()
+                try:
+                    sent = await outbox.drain(conn)
+                finally:
+                    await conn.close()
+                Console().print(f"Sent {sent} replies")
+            else:
+                await outbox.run(poll_interval=interval)
+        finally:
+            await clients.shutdown()
+    asyncio.run(_send())
+
+@app.command()
+def retry_failed(page_id: str = typer.Option(None, help="Only this Page")):
+    """Put replies that gave up back into the outbox (keeps the generated text)."""
+    async def _retry():
+        conn = await get_conn()
+        status = await conn.execute(
+            """
+            UPDATE replies r
+               SET state = 'pending', attempts = 0, next_attempt_at = now()
+              FROM comments c
+             WHERE c.id = r.post_id
+               AND r.state = 'failed'
+               AND ($1::TEXT IS NULL OR c.page_id = $1)
+            """,
+            page_id
+        )
+        await conn.close()
+        Console().print(f"Re-queued {status.split()[-1]} replies")
+    asyncio.run(_retry())
+
+@app.command()
+def add_faq(page_id: str, question: str, answer: str):
+    """Add a curated FAQ entry for a Page (run rebuild_faq_index afterwards)."""
+    async def _add():
+        conn = await get_conn()
+        await conn.execute(
+            "INSERT INTO faq_entries (page_id, question, answer) VALUES ($1, $2, $3)",
+            page_id, question, answer
+        )
+        await conn.close()
+        Console().print(f"Added FAQ entry for Page {page_id}")
+    asyncio.run(_add())
+
+@app.command()
+def rebuild_faq_index(page_id: str = typer.Option(None, help="Only rebuild this Page")):
+    """Rebuild the per-Page FAQ answer index from FAQ entries and sent replies."""
+    from services import faq_index
+
+    async def _rebuild():
+        conn = await get_conn()
+        if page_id:
+            page_ids = [page_id]
+        else:
+            page_ids = [r["page_id"] for r in await conn.fetch("SELECT page_id FROM page_settings")]
+        table = Table()
+        table.add_column("Page ID")
+        table.add_column("Entries")
+        for pid in page_ids:
+            table.add_row(pid, str(await faq_index.rebuild(conn, pid)))
+        await conn.close()
+        Console().print(table)
+    asyncio.run(_rebuild())
+
+@app.command()
+def faq_stats(days: int = typer.Option(7, help="Look back this many days")):
+    """Report FAQ-index hit rates per Page."""
+    async def _stats():
+        conn = await get_conn()
+        rows = await conn.fetch(
+            """
+            SELECT c.page_id,
+                   COUNT(*)                                    AS replies,
+                   COUNT(*) FILTER (WHERE r.source = 'faq')    AS faq_hits,
+                   AVG(r.faq_score) FILTER (WHERE r.source = 'faq') AS hit_score,
+                   AVG(r.faq_score) FILTER (WHERE r.source = 'llm') AS miss_score
+              FROM replies r
+              JOIN comments c ON c.id = r.post_id
+             WHERE r.created_at >= now() - make_interval(days => $1)
+             GROUP BY c.page_id
+             ORDER BY c.page_id
+            """,
+            days
+        )
+        await conn.close()
+        table = Table()
+        table.add_column("Page ID")
+        table.add_column("Replies")
+        table.add_column("FAQ hits")
+        table.add_column("Hit rate")
+        table.add_column("Avg hit score")
+        table.add_column("Avg miss score")
+        fmt = lambda v: "-" if v is None else f"{v:.2f}"
+        for r in rows:
+            rate = r["faq_hits"] / r["replies"] if r["replies"] else 0
+            table.add_row(
+                r["page_id"], str(r["replies"]), str(r["faq_hits"]),
+                f"{rate:.1%}", fmt(r["hit_score"]), fmt(r["miss_score"])
+            )
+        Console().print(table)
+    asyncio.run(_stats())
+
+@app.command()
+def report(
+    page_id: str = typer.Option(None, help="Only this Page"),
+    hours: int = typer.Option(24, help="Look back this many hours"),
+):
+    """Engagement summary per Page (from the hourly rollups)."""
+    from services import rollups
+
+    async def _report():
+        conn = await get_conn()
+        rows = await rollups.summary(conn, hours=hours, page_id=page_id)
+        await conn.close()
+        table = Table(title=f"Last {hours}h")
+        for col in ("Page ID", "Comments", "+ / = / -", "Replies", "Auto-reply rate",
+                    "FAQ rate", "Avg latency", "Mentions", "Review backlog"):
+            table.add_column(col)
+        pct = lambda v: "-" if v is None else f"{v:.1%}"
+        for r in rows:
+            latency = r["avg_reply_latency"]
+            table.add_row(
+                r["page_id"], str(r["comments"]),
+                f"{r['positive']} / {r['neutral']} / {r['negative']}",
+                str(r["replies_sent"]), pct(r["auto_reply_rate"]), pct(r["faq_rate"]),
+                "-" if latency is None else f"{latency:.0f}s",
+                str(r["mentions"]), str(r["pending_review"])
+            )
+        Console().print(table)
+    asyncio.run(_report())
+
+@app.command()
+def report_hourly(
+    page_id: str,
+    hours: int = typer.Option(24, help="Look back this many hours"),
+):
+    """Hour-by-hour engagement for one Page."""
+    from services import rollups
+
+    async def _report():
+        conn = await get_conn()
+        rows = await rollups.hourly(conn, page_id, hours=hours)
+        await conn.close()
+        table = Table(title=f"Page {page_id}, last {hours}h")
+        for col in ("Hour", "Comments", "+ / = / -", "Replies", "FAQ", "Avg latency", "Mentions"):
+            table.add_column(col)
+        for r in rows:
+            sent = r["replies_sent"]
+            table.add_row(
+                str(r["bucket"]), str(r["comments"]),
+                f"{r['positive']} / {r['neutral']} / {r['negative']}",
+                str(sent), str(r["faq_replies"]),
+                f"{r['reply_latency_sum'] / sent:.0f}s" if sent else "-",
+                str(r["mentions"])
+            )
+        Console().print(table)
+    asyncio.run(_report())
+
+@app.command()
+def rebuild_rollups():
+    """Recompute the engagement rollups from the raw tables."""
+    from services import rollups
+
+    async def _rebuild():
+        conn = await get_conn()
+        await rollups.rebuild(conn)
+        buckets = await conn.fetchval("SELECT COUNT(*) FROM engagement_hourly")
+        await conn.close()
+        Console().print(f"Rebuilt {buckets} hourly buckets")
+    asyncio.run(_rebuild())
+
+@app.command()
+def serve(
+    ingest_workers: int = typer.Option(None, help="uvicorn worker processes (default: half the cores)"),
+    reply_workers: int = typer.Option(None, help="reply worker processes (default: remaining cores)"),
+    host: str = typer.Option("0.0.0.0"),
+    port: int = typer.Option(8000),
+    run_dir: str = typer.Option("/tmp/autoengage", help="Unix sockets and per-process stats"),
+):
+    """Run the API with separate ingest and reply process pools."""
+    from services import workers
+
+    default_ingest, default_reply = workers.default_pool_sizes()
+    workers.serve(
+        ingest_workers or default_ingest,
+        reply_workers or default_reply,
+        host, port, run_dir
+    )
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# scripts/bench_faq.py: FAQ-index lookup latency
+#
+#   python scripts/bench_faq.py                  # FAQ_MAX_REPLIES entries
+#   python scripts/bench_faq.py --entries 500 1000 5000 20000
+#
+# Builds an index over synthetic Arabic/English comments (the same shape of
+# text real Pages get) and times faq_index.match() – index cache lookup,
+# query vectorization and scoring – exactly as handle_comment calls it.
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import faq_index  # noqa: E402
+
+WORDS = (
+    "how much price delivery alexandria cairo giza size small medium large xl color "
+    "red black white available where location shop open hours today tomorrow please "
+    "بكام السعر التوصيل اسكندرية القاهرة الجيزة مقاس لون متاح فين المحل مواعيد "
+    "الفستان ده الشنطة الجزمة البلوزة عايز عايزة ممكن لو سمحت شكرا تمام جميل النهارده بكره"
+).split()
+
+QUERIES = [
+    "عايزة اعرف الفستان ده بكام",
+    "how much is the black bag",
+    "التوصيل للاسكندرية بكام؟",
+    "do you have size medium",
+    "فين مكان المحل",
+]
+
+
+def synthetic_corpus(n: int, rng: random.Random) -> list[str]:
+    return [" ".join(rng.choices(WORDS, k=rng.randint(2, 12))) for _ in range(n)]
+
+
+def bench(entries: int, runs: int) -> list[float]:
+    rng = random.Random(entries)
+    questions = synthetic_corpus(entries, rng)
+    faq_index.save_index("bench", faq_index.build_index(questions, questions))
+    faq_index.match("bench", QUERIES[0])      # load + warm the per-process cache
+    samples = []
+    for i in range(runs):
+        query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        faq_index.match("bench", query)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure FAQ-index lookup latency")
+    parser.add_argument("--entries", type=int, nargs="+", default=[faq_index.FAQ_MAX_REPLIES])
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    faq_index.FAQ_INDEX_DIR = Path(tempfile.mkdtemp(prefix="autoengage-faq-"))
+    print(f"{'entries':>8} {'median':>10} {'p99':>10} {'max':>10}")
+    for entries in args.entries:
+        us = sorted(s * 1e6 for s in bench(entries, args.runs))
+        p99 = us[int(len(us) * 0.99) - 1]
+        print(f"{entries:>8} {statistics.median(us):>8.0f}us {p99:>8.0f}us {us[-1]:>8.0f}us")
+
+
+if __name__ == "__main__":
+    main()
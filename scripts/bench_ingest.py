@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# scripts/bench_ingest.py: webhook ingest throughput from 1 to N uvicorn workers
+#
+#   DATABASE_URL=postgres://…/scratch python scripts/bench_ingest.py --max-workers 8
+#
+# For each pool size it boots `uvicorn backend.main:app --workers n` (the
+# ingest pool manage.py serve runs), then POSTs /meta/webhook from several
+# client processes for a fixed time and reports accepted requests/s.
+# Payloads are feed "status" events: the full webhook path – JSON parsing,
+# page_settings upsert and read, post insert – without LLM calls, so the
+# numbers are bounded by the API processes and Postgres, not OpenAI.
+#
+# It writes rows for page BENCH_PAGE_ID and deletes them afterwards; point
+# it at a scratch database. Run the clients on other cores (or another host
+# via --url) when measuring many workers, or they compete with the server.
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_PAGE_ID = "bench-ingest-page"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, timeout: float = 60.0) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup (is DATABASE_URL reachable?)")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=0.5)
+            time.sleep(0.5 * workers)       # let every worker finish its lifespan
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.terminate()
+    raise TimeoutError("uvicorn did not answer /healthz in time")
+
+
+def payload() -> dict:
+    post_id = f"{BENCH_PAGE_ID}_{uuid.uuid4().hex}"
+    return {
+        "object": "page",
+        "entry": [{
+            "id": BENCH_PAGE_ID,
+            "time": int(time.time()),
+            "changes": [{
+                "field": "feed",
+                "value": {
+                    "item": "status", "verb": "add", "post_id": post_id,
+                    "message": "bench", "published": 1,
+                    "from": {"id": BENCH_PAGE_ID, "name": "Bench"},
+                    "created_time": int(time.time()),
+                },
+            }],
+        }],
+    }
+
+
+async def _client(url: str, duration: float, concurrency: int) -> tuple[int, int]:
+    import httpx
+    ok = errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(client):
+        nonlocal ok, errors
+        while time.perf_counter() < deadline:
+            try:
+                resp = await client.post(url, json=payload())
+                if resp.status_code == 200:
+                    ok += 1
+                else:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return ok, errors
+
+
+def run_client(args) -> tuple[int, int]:
+    return asyncio.run(_client(*args))
+
+
+def load(url: str, duration: float, clients: int, concurrency: int) -> tuple[float, int]:
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(clients) as pool:
+        results = pool.map(run_client, [(url, duration, concurrency)] * clients)
+    ok     = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    return ok / duration, errors
+
+
+async def cleanup():
+    import asyncpg
+    conn = await asyncpg.connect(os.getenv("DATABASE_URL"))
+    try:
+        await conn.execute("DELETE FROM posts WHERE page_id = $1", BENCH_PAGE_ID)
+        await conn.execute("DELETE FROM page_settings WHERE page_id = $1", BENCH_PAGE_ID)
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure webhook ingest scaling across uvicorn workers")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per pool size")
+    parser.add_argument("--clients", type=int, default=2, help="load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="in-flight requests per client")
+    parser.add_argument("--url", help="benchmark an already running server instead (single run)")
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'req/s':>10} {'speedup':>8} {'errors':>7}")
+    try:
+        if args.url:
+            rate, errors = load(args.url.rstrip("/") + "/meta/webhook", args.duration, args.clients, args.concurrency)
+            print(f"{'-':>7} {rate:>10.0f} {'':>8} {errors:>7}")
+            return
+        baseline = None
+        for n in range(1, args.max_workers + 1):
+            port = free_port()
+            proc = start_server(n, port)
+            try:
+                rate, errors = load(f"http://127.0.0.1:{port}/meta/webhook",
+                                    args.duration, args.clients, args.concurrency)
+            finally:
+                proc.terminate()
+                proc.wait()
+            baseline = baseline or rate
+            print(f"{n:>7} {rate:>10.0f} {rate / baseline:>7.2f}x {errors:>7}")
+    finally:
+        asyncio.run(cleanup())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# scripts/bench_startup.py: measure cold-start latency
+#
+#   python scripts/bench_startup.py            # CLI + DB commands + uvicorn worker boot
+#   python scripts/bench_startup.py --no-db --no-server
+#
+# "manage.py" rows time a full CLI process (interpreter start, imports,
+# typer dispatch). The --help rows never touch the DB; the DB rows run real
+# commands end to end (connect, query, render) and need a reachable
+# DATABASE_URL, as does "uvicorn", which times a single worker from spawn
+# until /healthz answers, i.e. imports plus the lifespan startup (DB pool,
+# clients, JWKS). toggle-auto-reply targets a Page that doesn't exist, so
+# it reads and updates nothing.
+import argparse
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CLI_CASES = [
+    ("manage.py --help",                   ["manage.py", "--help"]),
+    ("manage.py toggle-auto-reply --help", ["manage.py", "toggle-auto-reply", "--help"]),
+    ("import backend.main",                ["-c", "import backend.main"]),
+    ("import services.reply_engine",       ["-c", "import services.reply_engine"]),
+]
+
+BENCH_PAGE_ID = "bench-startup-page"
+DB_CASES = [
+    ("manage.py toggle-auto-reply",        ["manage.py", "toggle-auto-reply", BENCH_PAGE_ID]),
+    ("manage.py report",                   ["manage.py", "report"]),
+    ("manage.py list-pending",             ["manage.py", "list-pending"]),
+]
+
+
+def time_process(args: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_worker_boot(timeout: float = 30.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--workers", "1"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup (is DATABASE_URL reachable?)")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=0.5)
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("uvicorn did not answer /healthz in time")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def report(label: str, samples: list[float]):
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<40} median {statistics.median(ms):8.1f} ms   min {min(ms):8.1f} ms   max {max(ms):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI and API worker startup latency")
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("--no-db", action="store_true", help="skip the manage.py commands that query the DB")
+    parser.add_argument("--no-server", action="store_true", help="skip the uvicorn boot benchmark")
+    args = parser.parse_args()
+
+    # warm the bytecode cache so every run measures the same thing
+    time_process(["-c", "import backend.main, services.reply_engine"])
+
+    cases = CLI_CASES if args.no_db else CLI_CASES + DB_CASES
+    for label, cmd in cases:
+        report(label, [time_process(cmd) for _ in range(args.runs)])
+    if not args.no_server:
+        report("uvicorn worker boot -> /healthz", [time_worker_boot() for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
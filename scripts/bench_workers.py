@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# scripts/bench_workers.py: reply-pool throughput from 1 to N processes
+#
+#   python scripts/bench_workers.py --max-workers 8 --jobs 20000
+#
+# Starts the real reply pool (services.workers) behind the real Unix-socket
+# channel, but with a CPU-bound stand-in handler – the FAQ lookup and
+# request/response parsing a reply job does – so the numbers show how the
+# pool scales with cores without hitting Postgres, OpenAI or Graph.
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import channel, workers  # noqa: E402
+
+WORK_ROUNDS = int(os.getenv("BENCH_WORK_ROUNDS", "2000"))
+
+
+async def cpu_job(comment_id: str):
+    digest = comment_id.encode()
+    for _ in range(WORK_ROUNDS):
+        digest = hashlib.sha256(digest).digest()
+
+
+def jobs_done(metrics_dir: Path) -> int:
+    done = 0
+    for path in metrics_dir.glob("reply-*.json"):
+        try:
+            done += json.loads(path.read_text())["counters"].get("reply_jobs_done", 0)
+        except (OSError, ValueError):
+            pass
+    return done
+
+
+async def run_once(n_workers: int, jobs: int) -> float:
+    run_dir = tempfile.mkdtemp(prefix="autoengage-bench-")
+    workers.prepare_env(n_workers, run_dir)
+    metrics_dir = Path(os.environ["METRICS_DIR"])
+    procs = workers.start_reply_pool(n_workers, handler_path="bench_workers:cpu_job")
+    try:
+        # wait until every worker has bound its socket
+        while not all(channel.socket_path(i).exists() for i in range(n_workers)):
+            await asyncio.sleep(0.01)
+        channel._sender = None
+        sender = channel.get_sender()
+
+        start = time.perf_counter()
+        for i in range(jobs):
+            while not await sender.send(f"bench-{i}"):
+                await asyncio.sleep(0.001)      # every queue full: back off
+        while jobs_done(metrics_dir) < jobs:
+            await asyncio.sleep(0.01)
+        return time.perf_counter() - start
+    finally:
+        workers.stop_pool(procs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure reply-pool scaling across cores")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--jobs", type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ["STATS_FLUSH_INTERVAL"] = "0.05"
+    baseline = None
+    print(f"{'workers':>7} {'jobs/s':>10} {'speedup':>8}")
+    for n in range(1, args.max_workers + 1):
+        elapsed = asyncio.run(run_once(n, args.jobs))
+        rate = args.jobs / elapsed
+        baseline = baseline or rate
+        print(f"{n:>7} {rate:>10.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# services/channel.py: hand reply jobs from ingest processes to reply workers
+#
+# Two transports, picked from the environment:
+#   REPLY_QUEUE_URL=redis://…   a Redis list (LPUSH / BRPOP), works across hosts
+#   REPLY_WORKERS=<n>           one Unix datagram socket per reply worker under
+#                               REPLY_SOCKET_DIR; jobs are routed by comment ID
+# With neither set there is no channel and callers fall back to running the
+# job in-process (FastAPI BackgroundTasks), exactly as before.
+import asyncio
+import os
+import socket
+import zlib
+from pathlib import Path
+
+REDIS_QUEUE_KEY = "autoengage:reply_jobs"
+MAX_JOB_BYTES   = 1024
+
+
+def socket_dir() -> Path:
+    return Path(os.getenv("REPLY_SOCKET_DIR", "/tmp/autoengage"))
+
+
+def socket_path(index: int) -> Path:
+    return socket_dir() / f"reply-{index}.sock"
+
+
+# ───────────────────────────────────────────
+#  Unix datagram sockets
+# ───────────────────────────────────────────
+class UnixSender:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+    async def send(self, comment_id: str) -> bool:
+        data  = comment_id.encode()
+        first = zlib.crc32(data) % self.workers
+        # start at the comment's "home" worker, spill over if its queue is full
+        for i in range(self.workers):
+            try:
+                self.sock.sendto(data, str(socket_path((first + i) % self.workers)))
+                return True
+            except (BlockingIOError, FileNotFoundError, ConnectionRefusedError):
+                continue
+        return False
+
+
+class UnixReceiver:
+    def __init__(self, index: int):
+        path = socket_path(index)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)        # stale socket from a previous run
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(str(path))
+        self.sock.setblocking(False)
+
+    async def recv(self) -> str:
+        data = await asyncio.get_running_loop().sock_recv(self.sock, MAX_JOB_BYTES)
+        return data.decode()
+
+
+# ───────────────────────────────────────────
+#  Redis list (optional)
+# ───────────────────────────────────────────
+class RedisChannel:
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self.redis = redis.from_url(url)
+
+    async def send(self, comment_id: str) -> bool:
+        try:
+            await self.redis.lpush(REDIS_QUEUE_KEY, comment_id)
+        except Exception as exc:
+            print(f"Redis enqueue failed for {comment_id}: {exc}")
+            return False
+        return True
+
+    async def recv(self) -> str:
+        _, data = await self.redis.brpop(REDIS_QUEUE_KEY)
+        return data.decode()
+
+
+# ───────────────────────────────────────────
+#  Per-process singletons
+# ───────────────────────────────────────────
+_sender = None
+
+
+def get_sender():
+    """The ingest side of the channel, or None when no reply pool is configured."""
+    global _sender
+    if _sender is None:
+        if os.getenv("REPLY_QUEUE_URL"):
+            _sender = RedisChannel(os.environ["REPLY_QUEUE_URL"])
+        elif os.getenv("REPLY_WORKERS"):
+            _sender = UnixSender(int(os.environ["REPLY_WORKERS"]))
+    return _sender
+
+
+def get_receiver(index: int):
+    """The reply-worker side of the channel."""
+    if os.getenv("REPLY_QUEUE_URL"):
+        return RedisChannel(os.environ["REPLY_QUEUE_URL"])
+    return UnixReceiver(index)
@@ -0,0 +1,68 @@
+# services/clients.py: shared, lazily created clients
+#
+# Nothing here is built at import time. The API creates everything up front
+# in its lifespan (startup/shutdown); CLI commands and workers get each
+# client on first use, so `manage.py toggle_auto_reply` never pays for an
+# OpenAI client it doesn't need.
+import asyncio
+import os
+
+GRAPH_API_URL = "https://graph.facebook.com/v22.0"
+
+_llm   = None
+_graph = None
+_pool  = None
+_pool_lock = asyncio.Lock()
+
+
+def get_llm():
+    """AsyncOpenAI client (the openai package is only imported here)."""
+    global _llm
+    if _llm is None:
+        from openai import AsyncOpenAI
+        _llm = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _llm
+
+
+def get_graph():
+    """Pooled httpx client for the Facebook Graph API."""
+    global _graph
+    if _graph is None:
+        import httpx
+        # e.g. 30 s connect / 60 s read
+        _graph = httpx.AsyncClient(base_url=GRAPH_API_URL, timeout=httpx.Timeout(timeout=60.0))
+    return _graph
+
+
+async def get_pool():
+    """asyncpg connection pool, created on first use."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                import asyncpg
+                _pool = await asyncpg.create_pool(
+                    os.getenv("DATABASE_URL"),
+                    min_size=1,
+                    max_size=int(os.getenv("DB_POOL_SIZE", "10")),
+                )
+    return _pool
+
+
+async def startup():
+    """Eagerly create every client (FastAPI lifespan)."""
+    await get_pool()
+    get_llm()
+    get_graph()
+
+
+async def shutdown():
+    """Close whatever was created; safe to call even if nothing was."""
+    global _llm, _graph, _pool
+    if _pool is not None:
+        await _pool.close()
+    if _graph is not None:
+        await _graph.aclose()
+    if _llm is not None:
+        await _llm.close()
+    _llm = _graph = _pool = None
@@ -0,0 +1,275 @@
+# services/faq_index.py: per-page answer index for recurring questions
+import os
+import pickle
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+# Where the per-page indexes live (one pickle per Page ID)
+FAQ_INDEX_DIR     = Path(os.getenv("FAQ_INDEX_DIR", Path(__file__).parent.parent / ".faq_index"))
+# Below this cosine similarity we fall back to the LLM
+FAQ_MIN_SIMILARITY = float(os.getenv("FAQ_MIN_SIMILARITY", "0.9"))
+# ...or when a different question scores within this much of the best one
+FAQ_MIN_MARGIN     = float(os.getenv("FAQ_MIN_MARGIN", "0.05"))
+# Two words are the same word if they are at least this similar ("بكاام" / "بكام")
+FAQ_WORD_SIMILARITY = 0.8
+# Only the most recent sent replies are indexed
+FAQ_MAX_REPLIES   = int(os.getenv("FAQ_MAX_REPLIES", "5000"))
+
+# ───────────────────────────────────────────
+#  Text normalization (English + Egyptian Arabic)
+# ───────────────────────────────────────────
+_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]")
+_ALEF       = re.compile(r"[إأآٱ]")
+_REPEATS    = re.compile(r"(.)\1{2,}")
+_PUNCT      = re.compile(r"[^\w\s]")
+_DIGITS     = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Fold the spelling variants people actually type so that
+    "بكام؟", "بكاااام" and "بِكام" all land on the same n-grams.
+    """
+    text = unicodedata.normalize("NFKC", text).lower().translate(_DIGITS)
+    text = _DIACRITICS.sub("", text).replace("\u0640", "")   # tashkeel + tatweel
+    text = _ALEF.sub("ا", text).replace("ى", "ي").replace("ة", "ه")
+    text = _REPEATS.sub(r"\1\1", text)                      # "pleaseeee" -> "pleasee"
+    text = _PUNCT.sub(" ", text)
+    return " ".join(text.split())
+
+
+def same_words(a: str, b: str) -> bool:
+    """
+    True if every word of each text has a near-identical word in the other.
+    N-gram similarity stays high when a single word differs ("red" / "black"
+    dress, size "S" / "XL") or when the comment says more than the question;
+    both change the right answer, so they must not count as a match.
+    """
+    words_a = set(normalize_text(a).split())
+    words_b = set(normalize_text(b).split())
+
+    def covered(words, others):
+        return all(
+            w in others or any(
+                SequenceMatcher(None, w, o).ratio() >= FAQ_WORD_SIMILARITY for o in others
+            )
+            for w in words
+        )
+
+    return covered(words_a, words_b) and covered(words_b, words_a)
+
+
+# ───────────────────────────────────────────
+#  Index
+# ───────────────────────────────────────────
+class FaqIndex:
+    """
+    Character n-gram TF-IDF over known questions. The matrix is stored
+    transposed (n-grams x questions, CSR) with L2-normalized columns, so one
+    sparse product of the query row against it gives every cosine similarity.
+    """
+
+    def __init__(self, vectorizer, matrix, questions, answers):
+        self.vectorizer = vectorizer
+        self.matrix     = matrix            # scipy.sparse CSR, one column per question
+        self.questions  = questions
+        self.answers    = answers
+        self._prepare()
+
+    def __getstate__(self):
+        return {
+            "vectorizer": self.vectorizer, "matrix": self.matrix,
+            "questions": self.questions, "answers": self.answers,
+        }
+
+    def __setstate__(self, state):
+        state.setdefault("questions", None)     # pickled before questions were kept
+        self.__dict__.update(state)
+        self._prepare()
+
+    def _prepare(self):
+        # vectorizer.transform() re-validates its input on every call, which
+        # costs more than the lookup itself – build query vectors by hand
+        self._analyzer = self.vectorizer.build_analyzer()
+        self._vocab    = self.vectorizer.vocabulary_
+        self._idf      = self.vectorizer.idf_.astype(np.float32)
+
+    def __len__(self):
+        return len(self.answers)
+
+    def vectorize(self, text: str):
+        """Same weighting as the fitted vectorizer (sublinear tf * idf, L2)."""
+        counts = Counter(g for g in self._analyzer(text) if g in self._vocab)
+        n      = len(counts)
+        cols   = np.fromiter((self._vocab[g] for g in counts), dtype=np.int32, count=n)
+        tf     = np.fromiter(counts.values(), dtype=np.float32, count=n)
+        weights = (1.0 + np.log(tf)) * self._idf[cols]
+        norm    = np.linalg.norm(weights)
+        if norm:
+            weights /= norm
+        return sp.csr_matrix((weights, cols, [0, n]), shape=(1, self.matrix.shape[0]))
+
+    def scores(self, text: str):
+        """Cosine similarity of a comment to every known question."""
+        return (self.vectorize(text) @ self.matrix).toarray().ravel()
+
+    def lookup(self, text: str) -> tuple[str | None, float]:
+        """Return (best answer, similarity) for a comment, however weak."""
+        if not self.answers:
+            return None, 0.0
+        scores = self.scores(text)
+        best   = int(np.argmax(scores))
+        return self.answers[best], float(scores[best])
+
+    def match(self, text: str) -> tuple[str | None, float]:
+        """
+        Return (answer, similarity) only if the answer can be posted as is:
+        the best question clears FAQ_MIN_SIMILARITY, uses the same words as
+        the comment, and no other question comes within FAQ_MIN_MARGIN.
+        """
+        if not self.answers or self.questions is None:
+            return None, 0.0
+        scores = self.scores(text)
+        top    = np.argpartition(scores, -min(5, len(scores)))[-5:]
+        top    = top[np.argsort(scores[top])[::-1]]
+        best, score = int(top[0]), float(scores[top[0]])
+        if score < FAQ_MIN_SIMILARITY or not same_words(text, self.questions[best]):
+            return None, score
+        # the same question asked again is not a competitor, a different one is
+        for i in top[1:]:
+            if score - scores[i] >= FAQ_MIN_MARGIN:
+                break
+            if not same_words(self.questions[best], self.questions[i]):
+                return None, score
+        return self.answers[best], score
+
+
+def build_index(questions: list[str], answers: list[str]) -> FaqIndex:
+    # imported here so `import services.faq_index` stays cheap. Lookups are
+    # not sklearn-free: the pickled index holds the fitted TfidfVectorizer,
+    # so the first load_index() in a process imports scikit-learn too
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(
+        analyzer="char_wb",
+        ngram_range=(2, 4),
+        preprocessor=normalize_text,
+        sublinear_tf=True,
+        dtype=np.float32,
+    )
+    matrix = vectorizer.fit_transform(questions).T.tocsr()
+    return FaqIndex(vectorizer, matrix, list(questions), list(answers))
+
+
+async def fetch_corpus(conn, page_id: str) -> tuple[list[str], list[str]]:
+    """
+    Collect (question, answer) pairs for a Page: curated FAQ entries first,
+    then comments we already answered on Facebook. Sent replies that name
+    their customer are left out, so a hit never leaks one person's details
+    to another.
+    """
+    faq = await conn.fetch(
+        "SELECT question, answer FROM faq_entries WHERE page_id = $1 ORDER BY id",
+        page_id
+    )
+    sent = await conn.fetch(
+        """
+        SELECT c.text, c.user_name, r.reply_text
+          FROM replies r
+          JOIN comments c ON c.id = r.post_id
+         WHERE c.page_id = $1
+           AND c.parent_id IS NULL
+           AND r.state = 'sent'
+         ORDER BY r.created_at DESC
+         LIMIT $2
+        """,
+        page_id,
+        FAQ_MAX_REPLIES
+    )
+    questions = [r["question"] for r in faq]
+    answers   = [r["answer"] for r in faq]
+    for r in sent:
+        # replies are stored as "<user_name>, <answer>" – keep only the answer
+        answer = r["reply_text"]
+        prefix = f"{r['user_name']}, "
+        if answer.startswith(prefix):
+            answer = answer[len(prefix):]
+        # an answer that addresses its customer by name is not reusable
+        if mentions_name(answer, r["user_name"]):
+            continue
+        questions.append(r["text"])
+        answers.append(answer)
+    return questions, answers
+
+
+def mentions_name(text: str, user_name: str | None) -> bool:
+    """True if any part of `user_name` (first name, last name…) appears in `text`."""
+    if not user_name:
+        return False
+    words = set(normalize_text(text).split())
+    return any(len(part) > 1 and part in words for part in normalize_text(user_name).split())
+
+
+# ───────────────────────────────────────────
+#  Persistence + per-process cache
+# ───────────────────────────────────────────
+_cache: dict[str, tuple[float, FaqIndex]] = {}
+
+
+def index_path(page_id: str) -> Path:
+    return FAQ_INDEX_DIR / f"{page_id}.pkl"
+
+
+def save_index(page_id: str, index: FaqIndex) -> Path:
+    FAQ_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    path = index_path(page_id)
+    tmp  = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)       # readers never see a half-written file
+    _cache.pop(page_id, None)
+    return path
+
+
+def load_index(page_id: str) -> FaqIndex | None:
+    """Load a Page's index, reloading only when the file on disk changed."""
+    path = index_path(page_id)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    cached = _cache.get(page_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as f:
+        index = pickle.load(f)
+    _cache[page_id] = (mtime, index)
+    return index
+
+
+async def rebuild(conn, page_id: str) -> int:
+    """Rebuild and persist one Page's index. Returns the number of entries."""
+    questions, answers = await fetch_corpus(conn, page_id)
+    if not questions:
+        index_path(page_id).unlink(missing_ok=True)
+        _cache.pop(page_id, None)
+        return 0
+    save_index(page_id, build_index(questions, answers))
+    return len(questions)
+
+
+def match(page_id: str, text: str) -> tuple[str | None, float]:
+    """
+    Look up a comment in its Page's index.
+    Returns (answer, score) on a confident hit, (None, score) otherwise.
+    """
+    index = load_index(page_id)
+    if index is None:
+        return None, 0.0
+    return index.match(text)
@@ -0,0 +1,247 @@
+# services/outbox.py: reliable delivery of generated replies
+#
+# handle_comment only commits the reply text to `replies` (state 'pending');
+# everything that talks to Facebook goes through here. A row is claimed by
+# pushing its next_attempt_at forward by a lease, so a sender that crashes
+# mid-post simply lets the lease expire and another drain picks it up –
+# with the text that was already generated, never a fresh LLM call.
+import asyncio
+import os
+import random
+
+import httpx
+
+from services import rollups
+from services.clients import get_graph, get_pool
+
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BASE_DELAY   = float(os.getenv("OUTBOX_BASE_DELAY", "15"))     # seconds
+OUTBOX_MAX_DELAY    = float(os.getenv("OUTBOX_MAX_DELAY", "3600"))    # seconds
+OUTBOX_LEASE        = float(os.getenv("OUTBOX_LEASE", "120"))         # seconds
+
+
+async def post_reply(comment_id: str, reply_text: str, page_access_token:str ) -> str:
+    """
+    Post the generated reply via the Facebook Graph API.
+    Returns the new Facebook reply comment ID.
+    """
+    url = f"/{comment_id}/comments"
+    # form body, not query string: the URL ends up in exception reprs and logs
+    data = {
+        "message":      reply_text,
+        "access_token": page_access_token
+    }
+    response = await get_graph().post(url, data=data)
+    if response.status_code != 200:
+        # Log the full response for debugging
+        print("⚠️ Facebook reply failed!")
+        print("URL:  ", url)
+        print("Status:", response.status_code)
+        print("Response body:", response.text)
+    response.raise_for_status()
+    data = response.json()
+
+    return data.get("id")
+
+
+def backoff(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at OUTBOX_MAX_DELAY."""
+    delay = min(OUTBOX_MAX_DELAY, OUTBOX_BASE_DELAY * 2 ** (attempts - 1))
+    return random.uniform(delay / 2, delay)
+
+
+# Graph error codes that mean "try again later", even though Graph sends them
+# as HTTP 400/403: unknown / service unavailable, app, user and Page rate
+# limits, per-call throttling and business-use-case limits.
+GRAPH_TRANSIENT_CODES = {1, 2, 4, 17, 32, 341, 613, 80001}
+
+
+def _graph_error(response: httpx.Response) -> dict:
+    """The `error` object of a Graph error response ({} if there is none)."""
+    try:
+        body = response.json()
+    except ValueError:
+        return {}
+    error = body.get("error") if isinstance(body, dict) else None
+    return error if isinstance(error, dict) else {}
+
+
+def describe_error(exc: Exception) -> str:
+    """
+    Short, token-free description for logs and replies.last_error. Never
+    repr() an httpx error: it carries the request URL.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        error = _graph_error(exc.response)
+        parts = [f"HTTP {exc.response.status_code}"]
+        if "code" in error:
+            parts.append(f"Graph error {error['code']}")
+        if error.get("message"):
+            parts.append(str(error["message"]))
+        return ": ".join(parts)
+    if isinstance(exc, httpx.RequestError):
+        return type(exc).__name__
+    return f"{type(exc).__name__}: {exc}"
+
+
+def is_permanent(exc: Exception) -> bool:
+    """Graph 4xx (deleted comment, bad token…) won't fix itself; throttling, 5xx and network errors might."""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return False
+    status = exc.response.status_code
+    if not 400 <= status < 500 or status == 429:
+        return False
+    error = _graph_error(exc.response)
+    if error.get("is_transient") or error.get("code") in GRAPH_TRANSIENT_CODES:
+        return False
+    return True
+
+
+# ───────────────────────────────────────────
+#  Claim / deliver
+# ───────────────────────────────────────────
+async def claim(conn, reply_id: int | None = None, limit: int = 10):
+    """
+    Lease up to `limit` due replies (or just `reply_id`) for delivery.
+    SKIP LOCKED lets several senders drain the same table safely.
+    """
+    return await conn.fetch(
+        """
+        UPDATE replies
+           SET attempts        = attempts + 1,
+               next_attempt_at = now() + make_interval(secs => $3)
+         WHERE id IN (
+                 SELECT id
+                   FROM replies
+                  WHERE state = 'pending'
+                    AND next_attempt_at <= now()
+                    AND ($1::INTEGER IS NULL OR id = $1)
+                  ORDER BY next_attempt_at
+                  LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+               )
+        RETURNING id, post_id, reply_text, attempts
+        """,
+        reply_id,
+        limit,
+        OUTBOX_LEASE
+    )
+
+
+async def _fail(conn, row, error: str, permanent: bool = False):
+    if permanent or row["attempts"] >= OUTBOX_MAX_ATTEMPTS:
+        print(f"Giving up on reply {row['id']} for comment {row['post_id']}: {error}")
+        await conn.execute(
+            "UPDATE replies SET state = 'failed', last_error = $2 WHERE id = $1",
+            row["id"], error
+        )
+        return
+    delay = backoff(row["attempts"])
+    print(f"Reply {row['id']} attempt {row['attempts']} failed, retrying in {delay:.0f}s: {error}")
+    await conn.execute(
+        """
+        UPDATE replies
+           SET last_error = $2,
+               next_attempt_at = now() + make_interval(secs => $3)
+         WHERE id = $1
+        """,
+        row["id"], error, delay
+    )
+
+
+async def _page_token(conn, row) -> str | None:
+    return await conn.fetchval(
+        """
+        SELECT t.access_token
+          FROM comments c
+          JOIN page_tokens t ON t.page_id = c.page_id
+         WHERE c.id = $1
+        """,
+        row["post_id"]
+    )
+
+
+async def _post(row, page_token: str | None):
+    """Graph call only, no DB: returns (fb_reply_id, error, permanent)."""
+    if not page_token:
+        return None, f"No page token for comment {row['post_id']}", False
+    try:
+        fb_reply_id = await post_reply(row["post_id"], row["reply_text"], page_token)
+    except Exception as exc:
+        return None, describe_error(exc), is_permanent(exc)
+    if not fb_reply_id:
+        return None, "Graph response had no reply id", False
+    return fb_reply_id, None, False
+
+
+async def _record(conn, row, fb_reply_id, error, permanent) -> bool:
+    if error:
+        await _fail(conn, row, error, permanent=permanent)
+        return False
+    async with conn.transaction():
+        await conn.execute(
+            """
+            UPDATE replies
+               SET state = 'sent', fb_reply_id = $2, sent_at = now(), last_error = NULL
+             WHERE id = $1
+            """,
+            row["id"], fb_reply_id
+        )
+        await conn.execute(
+            "UPDATE comments SET replied = TRUE, reply_id = $2 WHERE id = $1",
+            row["post_id"], fb_reply_id
+        )
+        await rollups.record_reply(conn, row["id"])
+    return True
+
+
+async def deliver(conn, row) -> bool:
+    """Post one claimed reply and record the outcome. Returns True if sent."""
+    result = await _post(row, await _page_token(conn, row))
+    return await _record(conn, row, *result)
+
+
+async def send(reply_id: int) -> bool:
+    """
+    Try to deliver a single reply right away (if it's due and not leased).
+    Uses the shared pool but releases the connection during the Graph call.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await claim(conn, reply_id=reply_id, limit=1)
+        if not rows:
+            return False
+        row = rows[0]
+        page_token = await _page_token(conn, row)
+    result = await _post(row, page_token)
+    async with pool.acquire() as conn:
+        return await _record(conn, row, *result)
+
+
+async def drain(conn, batch: int = 10) -> int:
+    """Deliver every reply that is currently due. Returns how many were sent."""
+    sent = 0
+    while True:
+        rows = await claim(conn, limit=batch)
+        if not rows:
+            return sent
+        for row in rows:
+            sent += await deliver(conn, row)
+
+
+async def run(poll_interval: float = 5.0):
+    """
+    Dedicated sender loop. Each pass borrows a pooled connection, so a
+    connection that died is replaced on the next pass; errors are logged
+    and the loop keeps polling.
+    """
+    pool = await get_pool()
+    while True:
+        try:
+            async with pool.acquire() as conn:
+                sent = await drain(conn)
+            if sent:
+                print(f"Outbox: sent {sent} replies")
+        except Exception as exc:
+            print(f"Outbox drain failed, retrying in {poll_interval:.0f}s: {exc!r}")
+        await asyncio.sleep(poll_interval)
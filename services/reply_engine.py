@@ -1,19 +1,5 @@
-import os
-import asyncpg
-import httpx
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-
-# Environment
-DATABASE_URL      = os.getenv("DATABASE_URL")
-#PAGE_ACCESS_TOKEN = os.getenv("PAGE_ACCESS_TOKEN")
-OPENAI_API_KEY    = os.getenv("OPENAI_API_KEY")
-
-# Initialize OpenAI client
-llm = OpenAI(api_key=OPENAI_API_KEY)
-
+from services import channel, outbox, stats
+from services.clients import get_llm, get_pool
 
 
 async def generate_reply(comment_text: str) -> str:
@@ -24,7 +10,7 @@ async def generate_reply(comment_text: str) -> str:
         f"Brand-tone: Neutral.\n"
         f"Reply to this customer comment in the same language (Either English or Egyptian Arabic):\n\n\"{comment_text}\""
     )
-    resp = llm.chat.completions.create(
+    resp = await get_llm().chat.completions.create(
         model="gpt-4.1-nano",
         messages=[
             {"role": "system", "content": "You are a customer support assistant."},
@@ -33,36 +19,11 @@ async def generate_reply(comment_text: str) -> str:
     )
     return resp.choices[0].message.content.strip()
 
-async def post_reply(comment_id: str, reply_text: str, page_access_token:str ) -> str:
-    """
-    Post the generated reply via the Facebook Graph API.
-    Returns the new Facebook reply comment ID.
-    """
-    url = f"https://graph.facebook.com/v22.0/{comment_id}/comments"
-    params = {
-        "message":      reply_text,
-        "access_token": page_access_token
-    }
-    # e.g. 30 s connect / 60 s read
-    timeout = httpx.Timeout(timeout=60.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-            # Log the full response for debugging
-    if response.status_code != 200:
-        print("⚠️ Facebook reply failed!")
-        print("URL:  ", url)
-        print("Status:", response.status_code)
-        print("Request payload:", params)
-        print("Response body:", response.text)
-        response.raise_for_status()
-
-    return data.get("id")
-
 async def handle_comment(comment_id: str):
-    conn = await asyncpg.connect(DATABASE_URL)
-    try:
+    # Pooled connections are only held around DB work, never across the LLM
+    # or Graph calls – those take seconds and would starve the API's requests.
+    pool = await get_pool()
+    async with pool.acquire() as conn:
         # 1) Load the comment you’re replying to
         # Fetch comment text, page_id, and user_name
         row = await conn.fetchrow(
@@ -77,6 +38,18 @@ async def handle_comment(comment_id: str):
         )
         if not row:
             return
+        existing = await conn.fetchrow(
+            "SELECT id, state FROM replies WHERE post_id = $1",
+            comment_id
+        )
+
+    # Already generated? Never pay for the LLM twice – just (re)try delivery
+    if existing:
+        if existing["state"] == "pending":
+            await outbox.send(existing["id"])
+        return
+
+    async with pool.acquire() as conn:
         comment_text, page_id, user_id, user_name = row["text"], row["page_id"], row["user_id"], row["user_name"]
         page_name = await conn.fetchval(
         "SELECT page_name FROM page_tokens WHERE page_id=$1",
@@ -92,7 +65,6 @@ async def handle_comment(comment_id: str):
             print(f"No token for page {page_id}, skipping reply")
             return
 
-        page_token = token_row["access_token"]
         # Don’t ever reply to your own Page’s comments
         if user_id == page_id:
             return
@@ -121,49 +93,82 @@ async def handle_comment(comment_id: str):
             post_id
         )
 
-        # 3) Build the OpenAI chat history including author names
-        messages = [{
-                "role": "system",
-                "content": (
-                    f"You are an AI-powered customer support assistant for the “{page_name}” Facebook Page. "
-                    "Your goal is to respond in a friendly, helpful, and concise manner, using the full "
-                    "conversation context to answer users’ questions accurately."
-                    "Reply to this customer comment in the same language (Either English or Egyptian Arabic):"
-                )
-            }
-        ]
-
-        for msg in history:
-            author = "Assistant" if msg["user_id"] == page_id else msg["user_name"]
-            role   = "assistant" if msg["user_id"] == page_id else "user"
-            # prefix with name so AI knows who said what
-            messages.append({
-                "role": role,
-                "content": f"{author}: {msg['text']}"
-            })
-
-        # 4) Generate reply using full thread context
+    # 3) Build the OpenAI chat history including author names
+    messages = [{
+            "role": "system",
+            "content": (
+                f"You are an AI-powered customer support assistant for the “{page_name}” Facebook Page. "
+                "Your goal is to respond in a friendly, helpful, and concise manner, using the full "
+                "conversation context to answer users’ questions accurately."
+                "Reply to this customer comment in the same language (Either English or Egyptian Arabic):"
+            )
+        }
+    ]
+
+    for msg in history:
+        author = "Assistant" if msg["user_id"] == page_id else msg["user_name"]
+        role   = "assistant" if msg["user_id"] == page_id else "user"
+        # prefix with name so AI knows who said what
+        messages.append({
+            "role": role,
+            "content": f"{author}: {msg['text']}"
+        })
+
+    # 4) Standalone comment? Try the Page’s FAQ index before paying for the LLM
+    #    (imported here: numpy/scipy would add ~250 ms to every importer of this module;
+    #    the first lookup in a process also imports scikit-learn to unpickle the index)
+    raw_reply, faq_score = None, None
+    if len(history) == 1:
+        from services import faq_index
+        raw_reply, faq_score = faq_index.match(page_id, comment_text)
+    source = "faq" if raw_reply else "llm"
+
+    # 5) Otherwise generate reply using full thread context
+    if not raw_reply:
         raw_reply = await generate_reply(messages)
-        #raw_reply = response.choices[0].message.content.strip()
-        print(messages," ",raw_reply)
-        # 5) Prefix the user’s name for clarity
-        reply_text = f"{row['user_name']}, {raw_reply}"
-
-        # 6) Store & send as before…
-        await conn.execute(
-            "INSERT INTO replies (post_id, reply_text) VALUES ($1, $2)",
-            comment_id, reply_text
-        )
-        fb_reply_id = await post_reply(comment_id, reply_text, page_token)
-        if not fb_reply_id:
-            return
-        await conn.execute(
-            "UPDATE comments SET replied = TRUE, reply_id = $2 WHERE id = $1",
-            comment_id, fb_reply_id
+    #raw_reply = response.choices[0].message.content.strip()
+    print(messages," ",source," ",raw_reply)
+    # 6) Prefix the user’s name for clarity
+    reply_text = f"{row['user_name']}, {raw_reply}"
+
+    # 7) Commit to the outbox first, then make the first delivery attempt.
+    #    If posting fails (or we crash), the outbox sender retries this row.
+    async with pool.acquire() as conn:
+        reply_row_id = await conn.fetchval(
+            """
+            INSERT INTO replies (post_id, reply_text, source, faq_score)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (post_id) DO NOTHING
+            RETURNING id
+            """,
+            comment_id, reply_text, source, faq_score
         )
+    if reply_row_id is None:
+        return  # a concurrent handle_comment got there first
+    await outbox.send(reply_row_id)
 
-    finally:
-        await conn.close()
+
+async def queue_comment(background_tasks, comment_id: str):
+    """Hand a comment to the reply pool, or reply in-process if there is none."""
+    sender = channel.get_sender()
+    if sender and await sender.send(comment_id):
+        stats.incr("reply_jobs_queued")
+        return
+    stats.incr("reply_jobs_inline")
+    background_tasks.add_task(handle_comment, comment_id)
+
+
+async def unanswered_comments(conn) -> list[str]:
+    """Approved top-level comments that never got a reply generated."""
+    rows = await conn.fetch(
+        """
+        SELECT id FROM comments c
+         WHERE replied = FALSE AND parent_id IS NULL AND status = 'approved'
+           AND NOT EXISTS (SELECT 1 FROM replies r WHERE r.post_id = c.id)
+         ORDER BY created_at
+        """
+    )
+    return [r["id"] for r in rows]
 
 
 async def classify_sentiment(text: str) -> str:
@@ -175,7 +180,7 @@ async def classify_sentiment(text: str) -> str:
         "positive, neutral, negative.\n\n"
         f"Comment: \"{text}\""
     )
-    resp = llm.chat.completions.create(
+    resp = await get_llm().chat.completions.create(
         model="gpt-4.1-nano",
         messages=[
             {"role": "system", "content": "You are an expert sentiment analyzer."},
@@ -190,18 +195,24 @@ async def classify_sentiment(text: str) -> str:
 # Optional: CLI worker entrypoint
 def main():
     import asyncio
+    from dotenv import load_dotenv
+    from services import clients
+
+    load_dotenv()
+
     async def loop():
-        conn = await asyncpg.connect(DATABASE_URL)
+        pool = await get_pool()
+        conn = await pool.acquire()
         try:
             while True:
-                rows = await conn.fetch(
-                    "SELECT id FROM comments WHERE replied = FALSE AND parent_id IS NULL"
-                )
-                for r in rows:
-                    await handle_comment(r["id"])
+                for comment_id in await unanswered_comments(conn):
+                    await handle_comment(comment_id)
+                # retry anything whose delivery failed earlier
+                await outbox.drain(conn)
                 await asyncio.sleep(5)
         finally:
-            await conn.close()
+            await pool.release(conn)
+            await clients.shutdown()
     asyncio.run(loop())
 
 
@@ -0,0 +1,200 @@
+# services/rollups.py: incrementally maintained engagement analytics
+#
+# Every ingest / reply bumps a per-page, per-hour counter row in the same
+# transaction as the raw write, so dashboards read a handful of buckets
+# instead of scanning comments, replies and mentions.
+
+# ───────────────────────────────────────────
+#  Writers (call inside the raw write's transaction)
+# ───────────────────────────────────────────
+async def _bump(conn, page_id: str, ts, **counters):
+    cols = list(counters)
+    await conn.execute(
+        f"""
+        INSERT INTO engagement_hourly (page_id, bucket, {", ".join(cols)})
+        VALUES ($1, date_trunc('hour', $2::TIMESTAMPTZ), {", ".join(f"${i + 3}" for i in range(len(cols)))})
+        ON CONFLICT (page_id, bucket) DO UPDATE SET
+          {", ".join(f"{c} = engagement_hourly.{c} + EXCLUDED.{c}" for c in cols)}
+        """,
+        page_id, ts, *counters.values()
+    )
+
+
+async def _bump_backlog(conn, page_id: str, delta: int):
+    await conn.execute(
+        """
+        INSERT INTO page_backlog (page_id, pending_review) VALUES ($1, $2)
+        ON CONFLICT (page_id) DO UPDATE
+          SET pending_review = page_backlog.pending_review + EXCLUDED.pending_review
+        """,
+        page_id, delta
+    )
+
+
+async def record_comment(conn, page_id: str, created_at, sentiment: str, status: str):
+    """A new customer comment was stored."""
+    await _bump(
+        conn, page_id, created_at,
+        comments=1,
+        positive=int(sentiment == "positive"),
+        neutral=int(sentiment == "neutral"),
+        negative=int(sentiment == "negative"),
+    )
+    if status == "pending_review":
+        await _bump_backlog(conn, page_id, 1)
+
+
+async def record_review(conn, page_id: str):
+    """A pending comment was approved or rejected."""
+    await _bump_backlog(conn, page_id, -1)
+
+
+async def record_mention(conn, page_id: str, created_at):
+    await _bump(conn, page_id, created_at, mentions=1)
+
+
+async def record_reply(conn, reply_id: int):
+    """A reply was delivered; bucketed by the hour it went out."""
+    await conn.execute(
+        """
+        INSERT INTO engagement_hourly (page_id, bucket, replies_sent, faq_replies, reply_latency_sum)
+        SELECT c.page_id,
+               date_trunc('hour', r.sent_at),
+               1,
+               (r.source = 'faq')::INTEGER,
+               EXTRACT(EPOCH FROM r.sent_at - c.created_at)
+          FROM replies r
+          JOIN comments c ON c.id = r.post_id
+         WHERE r.id = $1
+        ON CONFLICT (page_id, bucket) DO UPDATE SET
+          replies_sent      = engagement_hourly.replies_sent      + EXCLUDED.replies_sent,
+          faq_replies       = engagement_hourly.faq_replies       + EXCLUDED.faq_replies,
+          reply_latency_sum = engagement_hourly.reply_latency_sum + EXCLUDED.reply_latency_sum
+        """,
+        reply_id
+    )
+
+
+# ───────────────────────────────────────────
+#  Readers
+# ───────────────────────────────────────────
+async def hourly(conn, page_id: str, hours: int = 24) -> list[dict]:
+    """Raw hourly buckets for the last `hours` hours (only non-empty ones)."""
+    rows = await conn.fetch(
+        """
+        SELECT bucket, comments, positive, neutral, negative,
+               replies_sent, faq_replies, reply_latency_sum, mentions
+          FROM engagement_hourly
+         WHERE page_id = $1
+           AND bucket > now() - make_interval(hours => $2)
+         ORDER BY bucket
+        """,
+        page_id, hours
+    )
+    return [dict(r) for r in rows]
+
+
+async def summary(conn, hours: int = 24, page_id: str | None = None) -> list[dict]:
+    """Totals and rates per Page over the last `hours` hours, plus review backlog."""
+    rows = await conn.fetch(
+        """
+        WITH totals AS (
+          SELECT page_id,
+                 SUM(comments)          AS comments,
+                 SUM(positive)          AS positive,
+                 SUM(neutral)           AS neutral,
+                 SUM(negative)          AS negative,
+                 SUM(replies_sent)      AS replies_sent,
+                 SUM(faq_replies)       AS faq_replies,
+                 SUM(reply_latency_sum) AS reply_latency_sum,
+                 SUM(mentions)          AS mentions
+            FROM engagement_hourly
+           WHERE bucket > now() - make_interval(hours => $1)
+             AND ($2::TEXT IS NULL OR page_id = $2)
+           GROUP BY page_id
+        )
+        SELECT COALESCE(t.page_id, b.page_id) AS page_id,
+               COALESCE(t.comments, 0)          AS comments,
+               COALESCE(t.positive, 0)          AS positive,
+               COALESCE(t.neutral, 0)           AS neutral,
+               COALESCE(t.negative, 0)          AS negative,
+               COALESCE(t.replies_sent, 0)      AS replies_sent,
+               COALESCE(t.faq_replies, 0)       AS faq_replies,
+               COALESCE(t.reply_latency_sum, 0) AS reply_latency_sum,
+               COALESCE(t.mentions, 0)          AS mentions,
+               COALESCE(b.pending_review, 0)    AS pending_review
+          FROM totals t
+          FULL JOIN (
+                 SELECT * FROM page_backlog WHERE $2::TEXT IS NULL OR page_id = $2
+               ) b ON b.page_id = t.page_id
+         ORDER BY 1
+        """,
+        hours, page_id
+    )
+    out = []
+    for r in rows:
+        d = dict(r)
+        comments, sent = d["comments"], d["replies_sent"]
+        d["auto_reply_rate"]   = sent / comments if comments else None
+        d["faq_rate"]          = d["faq_replies"] / sent if sent else None
+        d["avg_reply_latency"] = d.pop("reply_latency_sum") / sent if sent else None
+        out.append(d)
+    return out
+
+
+# ───────────────────────────────────────────
+#  Backfill
+# ───────────────────────────────────────────
+async def rebuild(conn):
+    """Recompute every rollup from the raw tables (first deploy, or after drift)."""
+    async with conn.transaction():
+        # block incremental writers so nothing lands between TRUNCATE and the refill
+        await conn.execute("LOCK TABLE engagement_hourly, page_backlog IN EXCLUSIVE MODE")
+        await conn.execute("TRUNCATE engagement_hourly, page_backlog")
+        await conn.execute(
+            """
+            INSERT INTO engagement_hourly (page_id, bucket, comments, positive, neutral, negative)
+            SELECT page_id, date_trunc('hour', created_at), COUNT(*),
+                   COUNT(*) FILTER (WHERE sentiment = 'positive'),
+                   COUNT(*) FILTER (WHERE sentiment = 'neutral'),
+                   COUNT(*) FILTER (WHERE sentiment = 'negative')
+              FROM comments
+             WHERE user_id IS DISTINCT FROM page_id
+             GROUP BY 1, 2
+            """
+        )
+        await conn.execute(
+            """
+            INSERT INTO engagement_hourly (page_id, bucket, replies_sent, faq_replies, reply_latency_sum)
+            SELECT c.page_id, date_trunc('hour', r.sent_at), COUNT(*),
+                   COUNT(*) FILTER (WHERE r.source = 'faq'),
+                   SUM(EXTRACT(EPOCH FROM r.sent_at - c.created_at))
+              FROM replies r
+              JOIN comments c ON c.id = r.post_id
+             WHERE r.state = 'sent'
+             GROUP BY 1, 2
+            ON CONFLICT (page_id, bucket) DO UPDATE SET
+              replies_sent      = EXCLUDED.replies_sent,
+              faq_replies       = EXCLUDED.faq_replies,
+              reply_latency_sum = EXCLUDED.reply_latency_sum
+            """
+        )
+        await conn.execute(
+            """
+            INSERT INTO engagement_hourly (page_id, bucket, mentions)
+            SELECT page_id, date_trunc('hour', created_at), COUNT(*)
+              FROM mentions
+             WHERE page_id IS NOT NULL
+             GROUP BY 1, 2
+            ON CONFLICT (page_id, bucket) DO UPDATE SET mentions = EXCLUDED.mentions
+            """
+        )
+        await conn.execute(
+            """
+            INSERT INTO page_backlog (page_id, pending_review)
+            SELECT page_id, COUNT(*)
+              FROM comments
+             WHERE status = 'pending_review'
+             GROUP BY 1
+            """
+        )
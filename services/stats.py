@@ -0,0 +1,101 @@
+# services/stats.py: per-process counters, aggregated across processes for /metrics
+#
+# Each process only touches its own counters. When METRICS_DIR is set
+# (manage.py serve does this), a background task snapshots them to
+# <METRICS_DIR>/<role>-<pid>.json and /metrics sums every live snapshot.
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+
+STATS_FLUSH_INTERVAL = float(os.getenv("STATS_FLUSH_INTERVAL", "1.0"))   # seconds
+
+_role     = "ingest"
+_counters = defaultdict(int)
+_dirty    = False
+
+
+def set_role(role: str):
+    global _role
+    _role = role
+
+
+def incr(name: str, n: int = 1):
+    global _dirty
+    _counters[name] += n
+    _dirty = True
+
+
+def snapshot() -> dict:
+    return {"role": _role, "pid": os.getpid(), "ts": time.time(), "counters": dict(_counters)}
+
+
+def _metrics_dir() -> Path | None:
+    path = os.getenv("METRICS_DIR")
+    return Path(path) if path else None
+
+
+def flush():
+    """Write this process's snapshot (atomically) if anything changed."""
+    global _dirty
+    directory = _metrics_dir()
+    if directory is None or not _dirty:
+        return
+    _dirty = False
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{_role}-{os.getpid()}.json"
+    tmp  = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(snapshot()))
+    os.replace(tmp, path)
+
+
+async def flush_forever():
+    while True:
+        flush()
+        await asyncio.sleep(STATS_FLUSH_INTERVAL)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect() -> list[dict]:
+    """Snapshots of every live process (or just this one without METRICS_DIR)."""
+    directory = _metrics_dir()
+    if directory is None:
+        return [snapshot()]
+    flush()
+    out = []
+    for path in directory.glob("*.json"):
+        try:
+            snap = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue        # raced with a writer or a cleanup
+        if _alive(snap["pid"]):
+            out.append(snap)
+        else:
+            path.unlink(missing_ok=True)
+    return out
+
+
+def render() -> str:
+    """Prometheus text format: per-role totals plus per-process series."""
+    snaps  = collect()
+    totals = defaultdict(int)
+    lines  = []
+    for snap in sorted(snaps, key=lambda s: (s["role"], s["pid"])):
+        lines.append(f'autoengage_process_up{{role="{snap["role"]}",pid="{snap["pid"]}"}} 1')
+        for name, value in sorted(snap["counters"].items()):
+            totals[(name, snap["role"])] += value
+            lines.append(f'autoengage_process_{name}{{role="{snap["role"]}",pid="{snap["pid"]}"}} {value}')
+    for (name, role), value in sorted(totals.items()):
+        lines.append(f'autoengage_{name}{{role="{role}"}} {value}')
+    return "\n".join(lines) + "\n"
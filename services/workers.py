@@ -0,0 +1,179 @@
+# services/workers.py: multi-process deployment (manage.py serve)
+#
+#   ingest pool  – uvicorn workers running backend.main:app; webhooks are
+#                  stored and reply jobs pushed onto services.channel
+#   reply pool   – processes that pull jobs off the channel and run
+#                  handle_comment; every worker also drains the reply outbox
+#                  (claims use SKIP LOCKED). Worker 0 at pool start, and any
+#                  worker the supervisor restarts, picks up approved comments
+#                  that never got a reply (jobs lost in a dead worker's queue)
+#
+# Processes share nothing but the channel, the database and the stats
+# snapshots in METRICS_DIR (summed by /metrics).
+import asyncio
+import importlib
+import multiprocessing
+import os
+import threading
+from pathlib import Path
+
+REPLY_CONCURRENCY = int(os.getenv("REPLY_CONCURRENCY", "32"))   # jobs in flight per process
+WATCH_INTERVAL    = 1.0                                          # seconds between liveness checks
+DEFAULT_HANDLER   = "services.reply_engine:handle_comment"
+
+
+def default_pool_sizes() -> tuple[int, int]:
+    """Split the cores between ingest and reply processes."""
+    cores  = os.cpu_count() or 1
+    ingest = max(1, cores // 2)
+    return ingest, max(1, cores - ingest)
+
+
+def _load_handler(path: str):
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+# ───────────────────────────────────────────
+#  Reply worker process
+# ───────────────────────────────────────────
+async def _reply_loop(index: int, handler_path: str, sweep_on_start: bool):
+    from services import channel, clients, outbox, stats
+
+    stats.set_role("reply")
+    handler  = _load_handler(handler_path)
+    receiver = channel.get_receiver(index)
+    slots    = asyncio.Semaphore(REPLY_CONCURRENCY)
+    tasks    = {asyncio.create_task(stats.flush_forever())}
+
+    async def run(comment_id: str):
+        try:
+            await handler(comment_id)
+            stats.incr("reply_jobs_done")
+        except Exception as exc:
+            stats.incr("reply_jobs_failed")
+            print(f"Reply job {comment_id} failed: {exc!r}")
+        finally:
+            slots.release()
+
+    def spawn(comment_id: str):
+        task = asyncio.create_task(run(comment_id))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def sweep():
+        from services.clients import get_pool
+        from services.reply_engine import unanswered_comments
+        try:
+            pool = await get_pool()
+            async with pool.acquire() as conn:
+                comment_ids = await unanswered_comments(conn)
+        except Exception as exc:
+            print(f"Reply worker {index}: startup sweep failed: {exc!r}")
+            return
+        if comment_ids:
+            print(f"Reply worker {index}: startup sweep found {len(comment_ids)} unanswered comments")
+        for comment_id in comment_ids:
+            await slots.acquire()
+            stats.incr("reply_jobs_swept")
+            spawn(comment_id)
+
+    if handler_path == DEFAULT_HANDLER:
+        tasks.add(asyncio.create_task(outbox.run()))
+        if sweep_on_start:
+            tasks.add(asyncio.create_task(sweep()))
+
+    try:
+        while True:
+            await slots.acquire()           # back-pressure: stop reading when saturated
+            comment_id = await receiver.recv()
+            stats.incr("reply_jobs_received")
+            spawn(comment_id)
+    finally:
+        for task in tasks:
+            task.cancel()
+        stats.flush()
+        await clients.shutdown()
+
+
+def run_reply_worker(index: int, handler_path: str = DEFAULT_HANDLER, sweep_on_start: bool = False):
+    """Process entrypoint for one reply worker."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    try:
+        asyncio.run(_reply_loop(index, handler_path, sweep_on_start))
+    except KeyboardInterrupt:
+        pass
+
+
+def start_reply_worker(index: int, handler_path: str = DEFAULT_HANDLER, sweep_on_start: bool = False):
+    ctx = multiprocessing.get_context("spawn")
+    proc = ctx.Process(
+        target=run_reply_worker, args=(index, handler_path, sweep_on_start),
+        name=f"reply-{index}", daemon=True
+    )
+    proc.start()
+    return proc
+
+
+def start_reply_pool(workers: int, handler_path: str = DEFAULT_HANDLER) -> list:
+    return [start_reply_worker(i, handler_path, sweep_on_start=(i == 0)) for i in range(workers)]
+
+
+def watch_pool(procs: list, stopping: threading.Event, handler_path: str = DEFAULT_HANDLER):
+    """
+    Restart reply workers that die, until `stopping` is set. `procs` is
+    updated in place so stop_pool() always sees the live processes. A
+    restarted worker sweeps on start: whatever sat in its socket is gone.
+    Exit code 0 is a Ctrl-C shutdown (SIGINT reaches the whole process
+    group before uvicorn returns), so those are left alone.
+    """
+    while not stopping.wait(WATCH_INTERVAL):
+        for i, proc in enumerate(procs):
+            if proc.is_alive() or proc.exitcode == 0 or stopping.is_set():
+                continue
+            print(f"Reply worker {i} exited with code {proc.exitcode}, restarting")
+            procs[i] = start_reply_worker(i, handler_path, sweep_on_start=True)
+
+
+def stop_pool(procs: list):
+    for p in procs:
+        p.terminate()
+    for p in procs:
+        p.join()
+
+
+def prepare_env(reply_workers: int, run_dir: str):
+    """
+    Environment every child (reply or uvicorn worker) inherits. Only the
+    files the pool itself creates are cleared from `run_dir` – it is an
+    operator-supplied path, so nothing else in it is touched.
+    """
+    run_path     = Path(run_dir)
+    metrics_path = run_path / "metrics"
+    metrics_path.mkdir(parents=True, exist_ok=True)
+    for stale in [*run_path.glob("reply-*.sock"), *metrics_path.glob("*.json"), *metrics_path.glob("*.tmp")]:
+        stale.unlink(missing_ok=True)
+    os.environ["REPLY_WORKERS"]    = str(reply_workers)
+    os.environ["REPLY_SOCKET_DIR"] = str(run_path)
+    os.environ["METRICS_DIR"]      = str(metrics_path)
+
+
+# ───────────────────────────────────────────
+#  Supervisor
+# ───────────────────────────────────────────
+def serve(ingest_workers: int, reply_workers: int, host: str, port: int, run_dir: str):
+    import uvicorn
+
+    prepare_env(reply_workers, run_dir)
+    procs    = start_reply_pool(reply_workers)
+    stopping = threading.Event()
+    watcher  = threading.Thread(target=watch_pool, args=(procs, stopping), name="reply-watch", daemon=True)
+    watcher.start()
+    print(f"Started {reply_workers} reply workers, {ingest_workers} ingest workers on {host}:{port}")
+    try:
+        uvicorn.run("backend.main:app", host=host, port=port, workers=ingest_workers)
+    finally:
+        stopping.set()
+        watcher.join()          # no restarts once we start terminating
+        stop_pool(procs)
@@ -0,0 +1,76 @@
+import asyncio
+import socket
+import zlib
+
+import pytest
+
+from services import channel
+from services.channel import UnixReceiver, UnixSender
+
+
+@pytest.fixture(autouse=True)
+def socket_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("REPLY_SOCKET_DIR", str(tmp_path))
+    return tmp_path
+
+
+def comment_for(worker: int, workers: int = 2) -> str:
+    """A comment ID whose home worker is `worker`."""
+    return next(
+        cid for cid in (f"1_{n}" for n in range(1000))
+        if zlib.crc32(cid.encode()) % workers == worker
+    )
+
+
+def fill(index: int):
+    """Send datagrams to a worker's socket until its queue is full."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    for _ in range(10_000):
+        try:
+            sock.sendto(b"x" * 512, str(channel.socket_path(index)))
+        except BlockingIOError:
+            return sock
+    pytest.fail("socket queue never filled up")
+
+
+def pending(receiver: UnixReceiver) -> list[str]:
+    out = []
+    while True:
+        try:
+            out.append(receiver.sock.recv(channel.MAX_JOB_BYTES).decode())
+        except BlockingIOError:
+            return out
+
+
+def test_job_goes_to_its_home_worker():
+    receivers = [UnixReceiver(0), UnixReceiver(1)]
+    comment_id = comment_for(1)
+    assert asyncio.run(UnixSender(2).send(comment_id))
+    assert pending(receivers[0]) == []
+    assert pending(receivers[1]) == [comment_id]
+
+
+def test_full_socket_spills_to_the_next_worker():
+    receivers = [UnixReceiver(0), UnixReceiver(1)]
+    filler = fill(0)
+    comment_id = comment_for(0)
+    assert asyncio.run(UnixSender(2).send(comment_id))
+    assert pending(receivers[1]) == [comment_id]
+    filler.close()
+
+
+def test_missing_socket_spills_to_the_next_worker():
+    receiver = UnixReceiver(1)              # worker 0 is down
+    comment_id = comment_for(0)
+    assert asyncio.run(UnixSender(2).send(comment_id))
+    assert pending(receiver) == [comment_id]
+
+
+def test_send_fails_when_every_worker_is_full_or_down():
+    receiver = UnixReceiver(0)              # worker 1 is down
+    filler = fill(0)
+    assert not asyncio.run(UnixSender(2).send(comment_for(0)))
+    assert not asyncio.run(UnixSender(2).send(comment_for(1)))
+    filler.close()
+    receiver.sock.close()
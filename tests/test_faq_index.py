@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from services import faq_index
+from services.faq_index import build_index, mentions_name, normalize_text, same_words
+
+QUESTIONS = [
+    "بكام الفستان ده؟",
+    "How much is the red dress?",
+    "فين مكانكم بالظبط",
+    "Do you deliver to Alexandria?",
+    "Is size XL available?",
+    "التوصيل بكام للقاهرة",
+]
+ANSWERS = [f"answer {i}" for i in range(len(QUESTIONS))]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_index(QUESTIONS, ANSWERS)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("بكام؟", "بكام"),
+    ("بكاااااام", "بكاام"),                      # long runs fold to two
+    ("بِكَام", "بكام"),                          # tashkeel
+    ("بكـــام", "بكام"),                          # tatweel
+    ("أحمد إسلام آمال", "احمد اسلام امال"),      # alef variants
+    ("مستشفى", "مستشفي"),                        # alef maqsura
+    ("مدرسة", "مدرسه"),                          # ta marbuta
+    ("٣٠٠ جنيه", "300 جنيه"),                    # Arabic-Indic digits
+    ("PLEASEEEE!!", "pleasee"),
+])
+def test_normalize_text_folds_variants(a, b):
+    assert normalize_text(a) == normalize_text(b)
+
+
+@pytest.mark.parametrize("text", [
+    "بكاام الفستان دة",
+    "how much is it",
+    "delivery to alexandria?",
+    "zzzz",                     # nothing in the vocabulary
+    "",
+])
+def test_vectorize_matches_sklearn_transform(index, text):
+    ours   = index.vectorize(text).toarray()
+    theirs = index.vectorizer.transform([text]).toarray()
+    np.testing.assert_allclose(ours, theirs, atol=1e-6)
+
+
+def test_lookup_finds_variant_spelling(index):
+    answer, score = index.lookup("بكاااام الفستان دة")
+    assert answer == "answer 0"
+    assert score > 0.8
+
+
+@pytest.mark.parametrize("text, answer", [
+    ("بكاااام الفستان دة", "answer 0"),
+    ("how much is the RED dress??", "answer 1"),
+    ("فين مكانكم بالظبط؟", "answer 2"),
+    ("is size xl available", "answer 4"),
+])
+def test_match_answers_the_same_question(index, text, answer):
+    assert index.match(text)[0] == answer
+
+
+@pytest.mark.parametrize("text", [
+    "How much is the black dress?",                 # one word changes the answer
+    "Is size S available?",
+    "Do you deliver to Alexandria? I ordered last week and it never arrived",
+    "بكام الفستان الازرق",
+    "التوصيل بكام للجيزة",
+])
+def test_match_near_misses_fall_back_to_the_llm(index, text):
+    answer, score = index.match(text)
+    assert answer is None
+
+
+def test_match_needs_a_margin_over_other_questions(monkeypatch):
+    index = build_index(["delivery to cairo price", "delivery to cairo price today"], ["a", "b"])
+    assert index.match("delivery to cairo price")[0] == "a"
+    monkeypatch.setattr(faq_index, "FAQ_MIN_MARGIN", 0.2)
+    assert index.match("delivery to cairo price")[0] is None
+
+
+def test_repeated_question_is_not_a_competitor():
+    index = build_index(["بكام الفستان ده", "بكام الفستان ده؟", "بكام الشنطة"], ["400", "400 جنيه", "250"])
+    assert index.match("بكام الفستان ده")[0] in ("400", "400 جنيه")
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("بكاااام الفستان دة", "بكام الفستان ده", True),
+    ("How much is the red dress", "how much is the black dress", False),
+    ("Do you deliver?", "Do you deliver? mine never arrived", False),
+])
+def test_same_words(a, b, expected):
+    assert same_words(a, b) is expected
+
+
+def test_lookup_survives_pickling(index):
+    import pickle
+    clone = pickle.loads(pickle.dumps(index))
+    assert clone.lookup("Do you deliver to alexandria") == index.lookup("Do you deliver to alexandria")
+    assert clone.match("Do you deliver to alexandria") == index.match("Do you deliver to alexandria")
+
+
+@pytest.mark.parametrize("text, name, expected", [
+    ("Hi Ahmed, it's 300 EGP", "Ahmed Ali", True),
+    ("أهلا يا احمد، السعر ٣٠٠", "أحمد علي", True),
+    ("It's 300 EGP", "Ahmed Ali", False),
+    ("It's 300 EGP", None, False),
+])
+def test_mentions_name(text, name, expected):
+    assert mentions_name(text, name) is expected
@@ -0,0 +1,68 @@
+import httpx
+import pytest
+
+from services.outbox import OUTBOX_BASE_DELAY, OUTBOX_MAX_DELAY, backoff, describe_error, is_permanent
+
+
+def graph_error(status: int, body=None, text=None) -> httpx.HTTPStatusError:
+    request  = httpx.Request("POST", "https://graph.facebook.com/v22.0/1_2/comments?access_token=EAAsecret")
+    if body is not None:
+        response = httpx.Response(status, json=body, request=request)
+    else:
+        response = httpx.Response(status, text=text or "", request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+@pytest.mark.parametrize("code", [4, 17, 32, 613])
+@pytest.mark.parametrize("status", [400, 403])
+def test_graph_throttling_is_transient(status, code):
+    exc = graph_error(status, {"error": {"message": "rate limited", "code": code}})
+    assert not is_permanent(exc)
+
+
+def test_is_transient_flag_is_honoured():
+    exc = graph_error(400, {"error": {"code": 9999, "is_transient": True}})
+    assert not is_permanent(exc)
+
+
+@pytest.mark.parametrize("body", [
+    {"error": {"message": "Object does not exist", "code": 100}},
+    {"error": {"message": "Invalid OAuth access token", "code": 190}},
+    {},
+])
+def test_other_client_errors_are_permanent(body):
+    assert is_permanent(graph_error(400, body))
+
+
+def test_non_json_4xx_is_permanent():
+    assert is_permanent(graph_error(404, text="not found"))
+
+
+@pytest.mark.parametrize("exc", [
+    graph_error(429, {}),
+    graph_error(500, {"error": {"code": 100}}),
+    graph_error(503, text="unavailable"),
+    httpx.ConnectTimeout("timed out"),
+])
+def test_server_and_network_errors_are_transient(exc):
+    assert not is_permanent(exc)
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (graph_error(400, {"error": {"message": "Object does not exist", "code": 100}}),
+     "HTTP 400: Graph error 100: Object does not exist"),
+    (graph_error(503, text="unavailable"), "HTTP 503"),
+    (httpx.ConnectTimeout("timed out", request=httpx.Request("POST", "https://x/?access_token=EAAsecret")),
+     "ConnectTimeout"),
+])
+def test_describe_error_never_includes_the_token(exc, expected):
+    assert describe_error(exc) == expected
+    assert "EAAsecret" not in describe_error(exc)
+
+
+def test_backoff_grows_and_is_capped():
+    # jitter keeps each delay within [d/2, d] of the exponential schedule
+    assert OUTBOX_BASE_DELAY / 2 <= backoff(1) <= OUTBOX_BASE_DELAY
+    assert OUTBOX_BASE_DELAY * 4 <= backoff(4) <= OUTBOX_BASE_DELAY * 8
+    for attempts in range(1, 30):
+        assert 0 < backoff(attempts) <= OUTBOX_MAX_DELAY
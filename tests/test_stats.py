@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services import stats
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(stats, "_counters", stats.defaultdict(int))
+    monkeypatch.setattr(stats, "_dirty", False)
+    monkeypatch.setattr(stats, "_role", "ingest")
+    return tmp_path
+
+
+def write_snapshot(directory, role, pid, **counters):
+    path = directory / f"{role}-{pid}.json"
+    path.write_text(json.dumps({"role": role, "pid": pid, "ts": 0, "counters": counters}))
+    return path
+
+
+def dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_render_sums_per_role(metrics_dir):
+    write_snapshot(metrics_dir, "ingest", os.getpid(), webhook_requests=3)
+    write_snapshot(metrics_dir, "ingest", os.getppid(), webhook_requests=4)
+    write_snapshot(metrics_dir, "reply", os.getpid(), reply_jobs_done=5)
+    lines = stats.render().splitlines()
+    assert 'autoengage_webhook_requests{role="ingest"} 7' in lines
+    assert 'autoengage_reply_jobs_done{role="reply"} 5' in lines
+    assert f'autoengage_process_webhook_requests{{role="ingest",pid="{os.getppid()}"}} 4' in lines
+    assert not any(line.startswith('autoengage_webhook_requests{role="reply"}') for line in lines)
+
+
+def test_collect_drops_dead_processes(metrics_dir):
+    live = write_snapshot(metrics_dir, "reply", os.getpid(), reply_jobs_done=1)
+    dead = write_snapshot(metrics_dir, "reply", dead_pid(), reply_jobs_done=9)
+    snaps = stats.collect()
+    assert [s["counters"] for s in snaps] == [{"reply_jobs_done": 1}]
+    assert live.exists()
+    assert not dead.exists()
+
+
+def test_collect_includes_this_process(metrics_dir):
+    stats.incr("webhook_requests", 2)
+    snaps = stats.collect()
+    assert [(s["role"], s["pid"], s["counters"]) for s in snaps] == [
+        ("ingest", os.getpid(), {"webhook_requests": 2})
+    ]
+    assert (metrics_dir / f"ingest-{os.getpid()}.json").exists()
+
+
+def test_collect_without_metrics_dir(monkeypatch):
+    monkeypatch.delenv("METRICS_DIR")
+    stats.incr("webhook_requests")
+    assert [s["counters"] for s in stats.collect()] == [{"webhook_requests": 1}]
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from services import workers
+
+
+@pytest.fixture(autouse=True)
+def restore_env(monkeypatch):
+    # prepare_env writes os.environ; let monkeypatch put it back afterwards
+    for name in ("REPLY_WORKERS", "REPLY_SOCKET_DIR", "METRICS_DIR"):
+        monkeypatch.setenv(name, "")
+
+
+def test_prepare_env_sets_up_the_run_dir(tmp_path):
+    workers.prepare_env(3, str(tmp_path))
+    assert os.environ["REPLY_WORKERS"] == "3"
+    assert os.environ["REPLY_SOCKET_DIR"] == str(tmp_path)
+    assert os.environ["METRICS_DIR"] == str(tmp_path / "metrics")
+    assert (tmp_path / "metrics").is_dir()
+
+
+def test_prepare_env_only_clears_its_own_files(tmp_path):
+    metrics = tmp_path / "metrics"
+    metrics.mkdir()
+    stale = [tmp_path / "reply-0.sock", tmp_path / "reply-7.sock",
+             metrics / "reply-123.json", metrics / "ingest-456.tmp"]
+    keep  = [tmp_path / "notes.txt", tmp_path / "app.sock", metrics / "README",
+             tmp_path / "sub" / "reply-0.sock"]
+    (tmp_path / "sub").mkdir()
+    for path in stale + keep:
+        path.write_text("x")
+
+    workers.prepare_env(2, str(tmp_path))
+
+    assert [p for p in stale if p.exists()] == []
+    assert [p for p in keep if not p.exists()] == []